@@ -1,21 +1,27 @@
 """
 Local Face + Voice AI - Assistant modules
 """
-from .audio import BilingualASR, Heard, is_stop_command, is_quit_command, parse_set_command
+from .audio import BilingualASR, Heard, command_kind, is_stop_command, is_quit_command, parse_set_command
 from .llm_ollama import OllamaClient, fallback_reply
-from .persona import build_system_prompt
+from .persona import build_system_prompt, presence_message, system_message
+from .phrases import get_phrases, pick_phrase
 from .tts import Speaker
 from .vision import FacePresence, FaceEvent
 
 __all__ = [
     "BilingualASR",
     "Heard",
+    "command_kind",
     "is_stop_command",
     "is_quit_command", 
     "parse_set_command",
     "OllamaClient",
     "fallback_reply",
     "build_system_prompt",
+    "system_message",
+    "presence_message",
+    "get_phrases",
+    "pick_phrase",
     "Speaker",
     "FacePresence",
     "FaceEvent",
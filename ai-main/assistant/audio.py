@@ -3,17 +3,26 @@ Audio module - VAD + Bilingual ASR - OPTIMIZED FOR SPEED
 """
 from __future__ import annotations
 import json
-import queue
+import os
 import re
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Callable
 
+import numpy as np
 import sounddevice as sd
 import webrtcvad
 from vosk import Model, KaldiRecognizer
 import config
 
+try:
+    import ahocorasick  # pyahocorasick: one-pass multi-word matching
+except ImportError:
+    ahocorasick = None
+
 
 @dataclass
 class Heard:
@@ -22,13 +31,77 @@ class Heard:
     confidence: float
 
 
+# Compiled once: _clean runs on every utterance and in every command helper
+_DISALLOWED_RE = re.compile(r"[^\w\sàâäçéèêëîïôöùûüÿ''-]", re.IGNORECASE)
+_WS_RE = re.compile(r"\s+")
+_SET_EN_RE = re.compile(r"set\s+(niceness|formality|banter|intelligence|speed|temperature)\s+([0-9]*\.?[0-9]+)")
+_SET_FR_RE = re.compile(r"(mets|met)\s+(gentillesse|politesse|taquinerie|intelligence|vitesse|temperature)\s+([0-9]*\.?[0-9]+)")
+
+
 def _clean(s: str) -> str:
     s = (s or "").lower().strip()
-    s = re.sub(r"[^\w\sàâäçéèêëîïôöùûüÿ''-]", " ", s, flags=re.IGNORECASE)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _DISALLOWED_RE.sub(" ", s)
+    s = _WS_RE.sub(" ", s).strip()
     return s
 
 
+class _FrameRing:
+    """Single-producer/single-consumer ring of int16 samples.
+
+    The PortAudio callback writes, the capture loop reads fixed-size frames.
+    Each counter only grows and is written by one side only, so the samples
+    need no lock under the GIL. The writer only touches the Event (which
+    does lock) when the reader has said it is about to block.
+    """
+
+    def __init__(self, capacity_frames: int, frame_samples: int):
+        self._buf = np.zeros(capacity_frames * frame_samples, np.int16)
+        self._size = len(self._buf)
+        self._frame = frame_samples
+        self._w = 0  # samples written (producer)
+        self._r = 0  # samples read (consumer)
+        self._data = threading.Event()
+        self._waiting = False  # reader is (about to be) blocked on _data
+
+    def write(self, samples: np.ndarray) -> bool:
+        """Copy samples in; drops them and returns False when full."""
+        n = len(samples)
+        if self._w - self._r + n > self._size:
+            return False
+        i = self._w % self._size
+        first = min(n, self._size - i)
+        self._buf[i:i + first] = samples[:first]
+        if first < n:
+            self._buf[:n - first] = samples[first:]
+        self._w += n
+        if self._waiting:
+            self._data.set()
+        return True
+
+    def read_frame(self, out: np.ndarray, timeout: float) -> bool:
+        """Copy one frame into out; False if none arrived within timeout."""
+        if self._w - self._r < self._frame:
+            self._data.clear()
+            self._waiting = True
+            # Re-check after flagging: a write before the flag is seen here,
+            # a write after it sees the flag and sets the event
+            if self._w - self._r < self._frame:
+                self._data.wait(timeout)
+            self._waiting = False
+            if self._w - self._r < self._frame:
+                return False
+        i = self._r % self._size
+        end = i + self._frame
+        if end <= self._size:
+            out[:] = self._buf[i:end]
+        else:
+            k = self._size - i
+            out[:k] = self._buf[i:]
+            out[k:] = self._buf[:end - self._size]
+        self._r += self._frame
+        return True
+
+
 class BilingualASR:
     """Bilingual ASR - OPTIMIZED FOR SPEED."""
     
@@ -39,7 +112,21 @@ class BilingualASR:
         self.frame_samples = int(config.SAMPLE_RATE * self.frame_ms / 1000)
         self.frame_bytes = self.frame_samples * 2
 
-        self._audio_q: "queue.Queue[bytes]" = queue.Queue(maxsize=200)
+        self._ring = _FrameRing(200, self.frame_samples)
+
+        # Recycled frame buffers (with int16 views to copy into). The pre-roll
+        # ring holds at most 20 frames and later frames are copied out at once,
+        # so 64 slots are never reused while still referenced.
+        self._frame_pool = [bytearray(self.frame_bytes) for _ in range(64)]
+        self._frame_views = [np.frombuffer(b, np.int16) for b in self._frame_pool]
+        self._pool_idx = 0
+
+        # Reused utterance buffer: room for the longest utterance plus pre-roll
+        self._preroll_ms = 400
+        self._utt_buf = bytearray(
+            int(config.VAD_MAX_UTTERANCE_SEC * config.SAMPLE_RATE * 2)
+            + int(self._preroll_ms / self.frame_ms + 1) * self.frame_bytes
+        )
         self._running = False
         self._stream = None
         
@@ -50,31 +137,119 @@ class BilingualASR:
         self._model_fr: Model | None = None
         self._recognizer_en = None
         self._recognizer_fr = None
+        self._whisper = None
+        self._streamed = False  # current utterance already fed to Vosk
+        self._late_models: list[tuple[str, tuple[Model, KaldiRecognizer] | None]] = []
         self._load_models()
 
+        # Wake words are static: clean once, longest first so stripping
+        # removes "hey assistant" before "assistant"
+        self._wake_clean: dict[str, list[str]] = {
+            lang: sorted({_clean(w) for w in words} - {""}, key=len, reverse=True)
+            for lang, words in (("en", config.WAKE_WORDS_EN), ("fr", config.WAKE_WORDS_FR))
+        }
+        self._wake_re: dict[str, re.Pattern | None] = {
+            lang: re.compile("|".join(re.escape(w) for w in words)) if words else None
+            for lang, words in self._wake_clean.items()
+        }
+        self._wake_ac: dict[str, "ahocorasick.Automaton"] = {}
+        if ahocorasick is not None:
+            for lang, words in self._wake_clean.items():
+                if words:
+                    ac = ahocorasick.Automaton()
+                    for w in words:
+                        ac.add_word(w, len(w))
+                    ac.make_automaton()
+                    self._wake_ac[lang] = ac
+
+        # EN and FR recognizers are independent and Vosk releases the GIL
+        # while decoding, so both languages can run side by side
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="asr")
+
     def _load_models(self):
-        """Load Vosk models and create persistent recognizers."""
+        """Load the ASR backend: Whisper if configured, else Vosk models + persistent recognizers."""
+        if config.ASR_BACKEND == "whisper":
+            self._load_whisper()
+            if self._whisper:
+                return
+            print("[ASR] Falling back to Vosk")
+
+        # Only the default language blocks startup; the other one is loaded
+        # in the background and installed at the next utterance boundary
+        default = "fr" if config.ASR_DEFAULT_LANG == "fr" else "en"
+        other = "en" if default == "fr" else "fr"
+        loaded = self._load_vosk(default)
+        if loaded:
+            self._install_recognizer(default, loaded)
+        else:
+            print(f"[ASR] Default model missing, waiting for {other.upper()}")
+        threading.Thread(target=self._prewarm, args=(other,), daemon=True).start()
+
+    def _load_vosk(self, lang: str) -> tuple[Model, KaldiRecognizer] | None:
+        """Load one Vosk model and its persistent recognizer."""
+        path = config.VOSK_MODEL_EN_PATH if lang == "en" else config.VOSK_MODEL_FR_PATH
         try:
-            self._model_en = Model(config.VOSK_MODEL_EN_PATH)
-            self._recognizer_en = KaldiRecognizer(self._model_en, config.SAMPLE_RATE)
-            self._recognizer_en.SetWords(True)
-            print(f"[ASR] Loaded EN model")
+            model = Model(path)
+            rec = KaldiRecognizer(model, config.SAMPLE_RATE)
+            rec.SetWords(True)
+            rec.SetMaxAlternatives(0)
+            print(f"[ASR] Loaded {lang.upper()} model")
+            return model, rec
         except Exception as e:
-            print(f"[ASR] Could not load EN model: {e}")
+            print(f"[ASR] Could not load {lang.upper()} model: {e}")
+            return None
+
+    def _install_recognizer(self, lang: str, loaded: tuple[Model, KaldiRecognizer]):
+        if lang == "en":
+            self._model_en, self._recognizer_en = loaded
+        else:
+            self._model_fr, self._recognizer_fr = loaded
+
+    def _prewarm(self, lang: str):
+        self._late_models.append((lang, self._load_vosk(lang)))
 
+    def _install_late_models(self):
+        """Add background-loaded recognizers; only called between utterances."""
+        while self._late_models:
+            lang, loaded = self._late_models.pop()
+            if loaded:
+                self._install_recognizer(lang, loaded)
+
+    def _load_whisper(self):
+        """Load a single multilingual faster-whisper model (int8 on CPU)."""
         try:
-            self._model_fr = Model(config.VOSK_MODEL_FR_PATH)
-            self._recognizer_fr = KaldiRecognizer(self._model_fr, config.SAMPLE_RATE)
-            self._recognizer_fr.SetWords(True)
-            print(f"[ASR] Loaded FR model")
+            from faster_whisper import WhisperModel
+            self._whisper = WhisperModel(
+                config.WHISPER_MODEL_SIZE,
+                device=config.WHISPER_DEVICE,
+                compute_type=config.WHISPER_COMPUTE_TYPE,
+                cpu_threads=os.cpu_count() or 0,
+            )
+            print(f"[ASR] Loaded Whisper model ({config.WHISPER_MODEL_SIZE}, {config.WHISPER_COMPUTE_TYPE})")
         except Exception as e:
-            print(f"[ASR] Could not load FR model: {e}")
+            print(f"[ASR] Could not load Whisper model: {e}")
+            self._whisper = None
+
+    def _asr_whisper(self, pcm: bytes) -> Heard | None:
+        """Run Whisper - one pass, language is auto-detected."""
+        audio = np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+        segments, info = self._whisper.transcribe(
+            audio, language=None, vad_filter=False, beam_size=1
+        )
+        text = " ".join(seg.text.strip() for seg in segments).strip()
+        if not text:
+            return None
+
+        # The rest of the app only knows EN/FR
+        lang = "fr" if info.language == "fr" else "en"
+        return Heard(text=text, lang=lang, confidence=float(info.language_probability))
 
-        if not self._model_en and not self._model_fr:
-            print("[ASR] No models loaded!")
+    def _asr_one(self, pcm: bytes | None, lang: str) -> Heard | None:
+        """Run ASR - uses persistent recognizer for speed.
 
-    def _asr_one(self, pcm: bytes, lang: str) -> Heard | None:
-        """Run ASR - uses persistent recognizer for speed."""
+        With pcm=None the utterance was already streamed into the recognizer
+        during capture, so only the final result is left to compute.
+        """
         if lang == "en":
             if not self._recognizer_en:
                 return None
@@ -84,9 +259,10 @@ class BilingualASR:
                 return None
             rec = self._recognizer_fr
 
-        # Reset recognizer state
-        rec.Reset()
-        rec.AcceptWaveform(pcm)
+        if pcm is not None:
+            # Reset recognizer state
+            rec.Reset()
+            rec.AcceptWaveform(pcm)
         out = rec.FinalResult()
 
         try:
@@ -108,12 +284,23 @@ class BilingualASR:
 
         return Heard(text=text, lang=lang, confidence=conf)
 
+    def _stream_reset(self):
+        """Drop any partially decoded audio from the recognizers."""
+        for rec in (self._recognizer_en, self._recognizer_fr):
+            if rec:
+                rec.Reset()
+        self._streamed = False
+
+    def _stream_feed(self, frame: bytes):
+        """Decode a frame as it is captured so only FinalResult remains at the end."""
+        for rec in (self._recognizer_en, self._recognizer_fr):
+            if rec:
+                rec.AcceptWaveform(frame)
+                self._streamed = True
+
     def _audio_callback(self, indata, frames, time_info, status):
-        b = indata.tobytes()
-        try:
-            self._audio_q.put_nowait(b)
-        except queue.Full:
-            pass
+        # Copy straight from PortAudio's buffer into the ring (mono channel)
+        self._ring.write(indata[:, 0])
 
     def _open_stream(self):
         return sd.InputStream(
@@ -121,6 +308,7 @@ class BilingualASR:
             channels=1,
             dtype="int16",
             blocksize=self.frame_samples,
+            latency=config.MIC_LATENCY,
             device=config.MIC_DEVICE_INDEX,
             callback=self._audio_callback,
         )
@@ -128,54 +316,77 @@ class BilingualASR:
     def listen_utterance(self) -> tuple[bytes, float] | None:
         """Capture one utterance - OPTIMIZED for speed."""
         triggered = False
-        voiced_frames: list[bytes] = []
-        ring: list[tuple[bytes, bool]] = []
-
-        ring_max = int(400 / self.frame_ms)  # Reduced pre-roll
+        buf = self._utt_buf
+        used = 0  # bytes of the current utterance in buf
+        fed = 0  # bytes of buf already streamed to Vosk
+        last_voiced = 0  # end of the last voiced frame in buf
+        # Trailing silence kept for decoder stability; the rest is never decoded
+        tail = int(config.ASR_TRAILING_SILENCE_MS * config.SAMPLE_RATE / 1000) * 2
+        ring_max = int(self._preroll_ms / self.frame_ms)  # Reduced pre-roll
         voiced_needed = max(2, int(0.25 * ring_max))  # More permissive trigger
 
+        # Pre-roll ring: deque evicts the oldest frame itself, and the voiced
+        # count is kept incrementally so each frame costs O(1)
+        ring: deque[tuple[bytearray, bool]] = deque(maxlen=ring_max)
+        num_voiced = 0
+
         silence_ms = 0
         utter_start: float | None = None
         non_speech_streak = 0
 
         while self._running:
-            try:
-                frame = self._audio_q.get(timeout=0.1)
-            except queue.Empty:
+            idx = self._pool_idx
+            if not self._ring.read_frame(self._frame_views[idx], timeout=0.1):
                 continue
+            frame = self._frame_pool[idx]
+            self._pool_idx = (idx + 1) % len(self._frame_pool)
 
             # --- CORRECTIF : ON IGNORE L'AUDIO SI LE ROBOT PARLE ---
             if self.on_speech_check and self.on_speech_check():
                 # On vide la mémoire tampon et on reset la détection
                 triggered = False
                 ring.clear()
-                voiced_frames.clear()
+                num_voiced = 0
+                used = fed = last_voiced = 0
+                if self._streamed:
+                    self._stream_reset()
                 continue
             # -------------------------------------------------------
 
-            if len(frame) != self.frame_bytes:
-                if len(frame) > self.frame_bytes:
-                    frame = frame[:self.frame_bytes]
-                else:
-                    frame = frame + b"\x00" * (self.frame_bytes - len(frame))
-
             is_speech = self.vad.is_speech(frame, config.SAMPLE_RATE)
 
             if not triggered:
+                if len(ring) == ring_max and ring[0][1]:
+                    num_voiced -= 1  # oldest frame is about to be evicted
                 ring.append((frame, is_speech))
-                if len(ring) > ring_max:
-                    ring.pop(0)
+                if is_speech:
+                    num_voiced += 1
 
-                num_voiced = sum(1 for _, s in ring if s)
                 if num_voiced >= voiced_needed:
                     triggered = True
                     utter_start = time.time()
-                    voiced_frames.extend([f for f, _ in ring])
+                    for f, _ in ring:
+                        buf[used:used + len(f)] = f
+                        used += len(f)
+                    self._install_late_models()
+                    self._stream_reset()
+                    self._stream_feed(bytes(memoryview(buf)[:used]))
+                    fed = last_voiced = used
                     ring.clear()
+                    num_voiced = 0
                     silence_ms = 0
                     non_speech_streak = 0
             else:
-                voiced_frames.append(frame)
+                buf[used:used + len(frame)] = frame
+                used += len(frame)
+
+                # Silence is held back and only streamed if speech resumes
+                if is_speech:
+                    last_voiced = used
+                limit = min(used, last_voiced + tail)
+                if limit > fed:
+                    self._stream_feed(bytes(memoryview(buf)[fed:limit]))  # Vosk wants bytes
+                    fed = limit
 
                 if utter_start and (time.time() - utter_start) >= float(config.VAD_MAX_UTTERANCE_SEC):
                     break
@@ -193,23 +404,36 @@ class BilingualASR:
                     if silence_ms >= int(config.VAD_SILENCE_MS_TO_END):
                         break
 
-        if not voiced_frames:
+        # Drop the end-of-speech silence beyond the kept tail
+        used = min(used, last_voiced + tail)
+        if not used:
             return None
 
-        dur = len(voiced_frames) * self.frame_ms / 1000.0
+        dur = used / 2 / config.SAMPLE_RATE
         if dur < config.MIN_UTTERANCE_SEC:
             return None
-            
-        return b"".join(voiced_frames), float(dur)
+
+        return bytes(memoryview(buf)[:used]), float(dur)
 
     def transcribe(self, pcm: bytes) -> Heard | None:
         """Transcribe - try both languages in parallel for speed."""
-        # Try both and pick best confidence
         start = time.time()
-        
-        fr = self._asr_one(pcm, "fr")
-        en = self._asr_one(pcm, "en")
-        
+
+        if self._whisper:
+            heard = self._asr_whisper(pcm)
+            print(f"[ASR] Transcription took {time.time() - start:.2f}s")
+            return heard
+
+        # Audio streamed during capture only needs FinalResult
+        src = None if self._streamed else pcm
+        self._streamed = False
+
+        # Try both and pick best confidence
+        f_fr = self._pool.submit(self._asr_one, src, "fr") if self._recognizer_fr else None
+        f_en = self._pool.submit(self._asr_one, src, "en") if self._recognizer_en else None
+        fr = f_fr.result() if f_fr else None
+        en = f_en.result() if f_en else None
+
         elapsed = time.time() - start
         print(f"[ASR] Transcription took {elapsed:.2f}s")
         
@@ -221,19 +445,38 @@ class BilingualASR:
     def passes_wake_word(self, heard: Heard) -> bool:
         if not config.WAKE_WORDS_ENABLED:
             return True
+        lang = "en" if heard.lang == "en" else "fr"
         t = _clean(heard.text)
-        wake = config.WAKE_WORDS_EN if heard.lang == "en" else config.WAKE_WORDS_FR
-        wake = [_clean(w) for w in wake]
-        return any(w in t for w in wake)
+        ac = self._wake_ac.get(lang)
+        if ac is not None:
+            return next(ac.iter(t), None) is not None
+        wake_re = self._wake_re[lang]
+        return bool(wake_re and wake_re.search(t))
 
     def strip_wake_word(self, heard: Heard) -> Heard:
         if not config.WAKE_WORDS_ENABLED:
             return heard
+        lang = "en" if heard.lang == "en" else "fr"
         t = _clean(heard.text)
-        wake = config.WAKE_WORDS_EN if heard.lang == "en" else config.WAKE_WORDS_FR
-        for w in sorted([_clean(x) for x in wake], key=len, reverse=True):
-            t = t.replace(w, "").strip()
-        heard.text = t
+        ac = self._wake_ac.get(lang)
+        if ac is not None:
+            # All hits in one pass; keep the longest non-overlapping ones
+            hits = sorted(((end + 1 - n, end + 1) for end, n in ac.iter(t)),
+                          key=lambda h: (h[0] - h[1], h[0]))
+            keep: list[tuple[int, int]] = []
+            for a, b in hits:
+                if all(b <= ka or a >= kb for ka, kb in keep):
+                    keep.append((a, b))
+            parts, pos = [], 0
+            for a, b in sorted(keep):
+                parts.append(t[pos:a])
+                pos = b
+            parts.append(t[pos:])
+            t = "".join(parts)
+        elif self._wake_re[lang]:
+            # Alternation is longest-first, so one sub removes every wake word
+            t = self._wake_re[lang].sub("", t)
+        heard.text = _WS_RE.sub(" ", t).strip()
         return heard
 
     def start(self):
@@ -286,26 +529,44 @@ class BilingualASR:
 
 # --- Voice command helpers ---
 
-def is_stop_command(text: str) -> bool:
+# Whole-utterance commands (cleaned text -> kind), one dict lookup per utterance
+_COMMANDS: dict[str, str] = {
+    **dict.fromkeys(("stop", "arrête", "arrete", "ta gueule", "silence", "shut up", "tais-toi", "tais toi"), "stop"),
+    **dict.fromkeys(("quit", "exit", "quitte", "bye app", "au revoir app", "ferme", "close", "goodbye app"), "quit"),
+    **dict.fromkeys(("clear", "efface", "reset", "recommence"), "clear"),
+}
+# Commands that also count as the first word ("stop talking")
+_PREFIX_COMMANDS: dict[str, str] = {
+    "stop": "stop", "arrête": "stop", "arrete": "stop",
+    "quit": "quit", "exit": "quit", "quitte": "quit",
+}
+
+
+def command_kind(text: str) -> str | None:
+    """Classify an utterance as "stop", "quit", "clear", or None."""
     t = _clean(text)
-    stop_words = {"stop", "arrête", "arrete", "ta gueule", "silence", "shut up", "tais-toi", "tais toi"}
-    return t in stop_words or any(t.startswith(w + " ") for w in ["stop", "arrête", "arrete"])
+    kind = _COMMANDS.get(t)
+    if kind is None:
+        kind = _PREFIX_COMMANDS.get(t.partition(" ")[0])
+    return kind
+
+
+def is_stop_command(text: str) -> bool:
+    return command_kind(text) == "stop"
 
 
 def is_quit_command(text: str) -> bool:
-    t = _clean(text)
-    quit_words = {"quit", "exit", "quitte", "bye app", "au revoir app", "ferme", "close", "goodbye app"}
-    return t in quit_words or any(t.startswith(w + " ") for w in ["quit", "exit", "quitte"])
+    return command_kind(text) == "quit"
 
 
 def parse_set_command(text: str) -> tuple[str, float] | None:
     t = _clean(text)
     
-    m = re.match(r"set\s+(niceness|formality|banter|intelligence|speed|temperature)\s+([0-9]*\.?[0-9]+)", t)
+    m = _SET_EN_RE.match(t)
     if m:
         return m.group(1), float(m.group(2))
 
-    m = re.match(r"(mets|met)\s+(gentillesse|politesse|taquinerie|intelligence|vitesse|temperature)\s+([0-9]*\.?[0-9]+)", t)
+    m = _SET_FR_RE.match(t)
     if m:
         fr_key = m.group(2)
         val = float(m.group(3))
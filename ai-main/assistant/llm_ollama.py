@@ -3,10 +3,16 @@ Ollama LLM Client - Local AI inference
 Supports both streaming and non-streaming modes.
 """
 from __future__ import annotations
+import time
 import requests
-import json
+from requests.adapters import HTTPAdapter
 import config
 
+try:
+    import orjson as _json  # C parser, takes the raw bytes lines directly
+except ImportError:
+    import json as _json
+
 
 class OllamaClient:
     """Client for Ollama local LLM API."""
@@ -14,18 +20,41 @@ class OllamaClient:
     def __init__(self, base_url: str | None = None):
         self.base_url = (base_url or config.OLLAMA_BASE_URL).rstrip("/")
 
+        # One keep-alive session: no new TCP connection per request
+        self._s = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=2, max_retries=0)
+        self._s.mount("http://", adapter)
+        self._s.mount("https://", adapter)
+
+        # is_up_cached(): (monotonic deadline, last probe result)
+        self._up_deadline = 0.0
+        self._up_last = False
+
     def is_up(self) -> bool:
         """Check if Ollama server is running."""
         try:
-            r = requests.get(self.base_url, timeout=2)
+            r = self._s.get(self.base_url, timeout=2)
             return r.status_code < 500
         except Exception:
             return False
 
+    def is_up_cached(self, ttl: float = 5.0) -> bool:
+        """is_up(), but reuse the last answer for ttl seconds."""
+        now = time.monotonic()
+        if now < self._up_deadline:
+            return self._up_last
+        self._up_last = self.is_up()
+        self._up_deadline = now + ttl
+        return self._up_last
+
+    def invalidate_status(self):
+        """Force the next is_up_cached() to probe the server again."""
+        self._up_deadline = 0.0
+
     def list_models(self) -> list[str]:
         """List available models."""
         try:
-            r = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            r = self._s.get(f"{self.base_url}/api/tags", timeout=5)
             r.raise_for_status()
             data = r.json()
             return [m.get("name", "") for m in data.get("models", [])]
@@ -47,7 +76,7 @@ class OllamaClient:
             },
         }
         
-        r = requests.post(url, json=payload, timeout=config.OLLAMA_TIMEOUT_SEC)
+        r = self._s.post(url, json=payload, timeout=config.OLLAMA_TIMEOUT_SEC)
         r.raise_for_status()
         data = r.json()
         msg = data.get("message", {}) or {}
@@ -69,19 +98,19 @@ class OllamaClient:
             },
         }
         
-        with requests.post(url, json=payload, stream=True, timeout=config.OLLAMA_TIMEOUT_SEC) as r:
+        with self._s.post(url, json=payload, stream=True, timeout=config.OLLAMA_TIMEOUT_SEC) as r:
             r.raise_for_status()
-            for line in r.iter_lines():
+            for line in r.iter_lines(decode_unicode=False):
                 if line:
                     try:
-                        data = json.loads(line)
+                        data = _json.loads(line)
                         msg = data.get("message", {}) or {}
                         token = msg.get("content", "")
                         if token:
                             yield token
                         if data.get("done", False):
                             break
-                    except json.JSONDecodeError:
+                    except _json.JSONDecodeError:
                         continue
 
     def chat_stream_full(self, model: str, messages: list[dict], *, max_tokens: int, temperature: float) -> str:
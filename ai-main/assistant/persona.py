@@ -4,6 +4,21 @@ Persona module - Dynamic system prompt generation based on personality settings.
 from __future__ import annotations
 import config
 
+# Built prompts keyed by language + every config value they depend on, so a
+# changed slider simply misses the cache
+_PROMPT_CACHE: dict[tuple, str] = {}
+# Ready-made {"role": "system"} dicts per prompt; shared, do not mutate
+_MESSAGE_CACHE: dict[str, dict] = {}
+
+# Only four possible presence notes, so build them once
+_PRESENCE_NOTE = {
+    ("en", True): "Face present on camera: YES.",
+    ("en", False): "Face present on camera: NO (user might be away).",
+    ("fr", True): "Visage présent à la caméra : OUI.",
+    ("fr", False): "Visage présent à la caméra : NON (l'utilisateur est peut-être parti).",
+}
+_PRESENCE_MESSAGE = {k: {"role": "system", "content": v} for k, v in _PRESENCE_NOTE.items()}
+
 
 def _band(v: float, labels: list[str]) -> str:
     """Map a 0-1 value to a label from a list."""
@@ -22,6 +37,12 @@ def build_system_prompt(language: str) -> str:
     Returns:
         System prompt string
     """
+    key = (language, config.NICENESS, config.FORMALITY, config.BANTER,
+           config.INTELLIGENCE, config.ALLOW_REAL_INSULTS)
+    cached = _PROMPT_CACHE.get(key)
+    if cached is not None:
+        return cached
+
     niceness = config.clamp01(config.NICENESS)
     formality = config.clamp01(config.FORMALITY)
     banter = config.clamp01(config.BANTER)
@@ -80,7 +101,29 @@ You're here to help quickly and efficiently."""
         else:
             base += "\n\nNote: Teasing must stay friendly and PG-13."
 
-    return base.strip()
+    prompt = base.strip()
+    _PROMPT_CACHE[key] = prompt
+    return prompt
+
+
+def system_message(language: str) -> dict:
+    """System prompt wrapped as a chat message, reused across turns."""
+    prompt = build_system_prompt(language)
+    msg = _MESSAGE_CACHE.get(prompt)
+    if msg is None:
+        msg = _MESSAGE_CACHE[prompt] = {"role": "system", "content": prompt}
+    return msg
+
+
+def presence_message(language: str, present: bool) -> dict:
+    """Face presence note as a chat message (shared, do not mutate)."""
+    return _PRESENCE_MESSAGE.get((language, present)) or _PRESENCE_MESSAGE[("en", present)]
+
+
+def clear_prompt_cache():
+    """Forget built prompts (called when a personality slider changes)."""
+    _PROMPT_CACHE.clear()
+    _MESSAGE_CACHE.clear()
 
 
 def build_short_prompt(language: str) -> str:
@@ -0,0 +1,82 @@
+"""
+Phrases module - Greeting / goodbye lines, loaded lazily per language.
+"""
+from __future__ import annotations
+import functools
+import random
+from pathlib import Path
+
+_PHRASES_DIR = Path(__file__).resolve().parent.parent / "phrases"
+
+# Used when a phrase file is missing or empty
+_FALLBACKS: dict[tuple[str, str], tuple[str, ...]] = {
+    ("greeting", "en"): (
+        "Hey! I see you.",
+        "Hi — you're back.",
+        "Hello there.",
+        "Oh, a human. Nice.",
+        "Hi. I'm listening.",
+    ),
+    ("greeting", "fr"): (
+        "Salut, je te vois.",
+        "Hey, te revoilà.",
+        "Bonjour.",
+        "Oh, un humain. Nice.",
+        "Salut. Je t'écoute.",
+    ),
+    ("goodbye", "en"): (
+        "Where'd you go?",
+        "I lost your face. Still there?",
+        "Okay, goodbye for now.",
+        "Hey—don't vanish on me.",
+    ),
+    ("goodbye", "fr"): (
+        "T'es où ?",
+        "Je ne te vois plus. T'es encore là ?",
+        "Ok, à plus.",
+        "Hey—reviens.",
+    ),
+}
+
+
+def _load_lines(path: Path) -> list[str]:
+    """Load non-empty, non-comment lines from a text file."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [l.strip() for l in f if l.strip() and not l.strip().startswith("#")]
+    except Exception:
+        return []
+
+
+@functools.lru_cache(maxsize=None)
+def get_phrases(kind: str, lang: str) -> tuple[str, ...]:
+    """
+    Get the phrases for a kind ("greeting" / "goodbye") and language.
+
+    The file is read on first use only; the tuple is cached and immutable.
+    """
+    lang = "fr" if lang == "fr" else "en"
+    lines = _load_lines(_PHRASES_DIR / f"{kind}s_{lang}.txt")
+    return tuple(lines) or _FALLBACKS.get((kind, lang), ())
+
+
+def pick_phrase(phrases: tuple[str, ...], last_idx: dict[str, int], key: str,
+                rng: random.Random) -> str:
+    """
+    Pick a random phrase, never the one picked last time for this key.
+
+    Draws from the other n - 1 indices so every candidate is equally likely.
+    """
+    n = len(phrases)
+    if n <= 1:
+        return phrases[0] if phrases else ""
+
+    last = last_idx.get(key, -1)
+    if 0 <= last < n:
+        i = rng.randrange(n - 1)
+        if i >= last:
+            i += 1
+    else:
+        i = rng.randrange(n)
+    last_idx[key] = i
+    return phrases[i]
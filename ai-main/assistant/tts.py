@@ -1,6 +1,6 @@
 """
 Text-to-Speech - Windows pyttsx3 - ROBUST VERSION
-Creates fresh engine for each message to avoid Windows COM issues
+Keeps one engine alive and recreates it only after an error (Windows COM issues)
 """
 from __future__ import annotations
 import threading
@@ -13,7 +13,7 @@ _SHUTDOWN = "__SHUTDOWN__"
 
 
 class Speaker:
-    """Thread-safe TTS speaker - recreates engine per message for reliability."""
+    """Thread-safe TTS speaker - one persistent engine, rebuilt on failure."""
     
     def __init__(self):
         self._queue: queue.Queue = queue.Queue()
@@ -29,29 +29,37 @@ class Speaker:
         return self._speaking_event.is_set()
 
     def _create_engine(self):
-        """Create and configure a fresh TTS engine."""
+        """Create and configure a TTS engine, and pick a voice per language."""
         engine = pyttsx3.init()
         voices = engine.getProperty('voices')
-        
-        # Try to find a good voice
+
+        # Scan the voice list once instead of on every message
+        default_voice = engine.getProperty('voice')
+        voice_for = {"en": default_voice, "fr": default_voice}
+        found = set()
         for v in voices:
             name = v.name.lower()
-            if 'zira' in name or 'david' in name:
-                engine.setProperty('voice', v.id)
-                break
-        
+            if "fr" not in found and ("french" in name or "paul" in name or "hortense" in name):
+                voice_for["fr"] = v.id
+                found.add("fr")
+            elif "en" not in found and ("zira" in name or "david" in name or "english" in name):
+                voice_for["en"] = v.id
+                found.add("en")
+
+        engine.setProperty('voice', voice_for["en"])
         engine.setProperty('rate', 175)
         engine.setProperty('volume', 1.0)
-        return engine, voices
-    
+        return engine, voices, voice_for
+
     def _run(self):
-        """TTS thread - creates fresh engine for each message."""
-        # Initial test
+        """TTS thread - keeps one engine alive, rebuilds it only after an error."""
+        engine = None
+        voice_for: dict[str, str] = {}
+        current_voice = None
         try:
-            engine, voices = self._create_engine()
+            engine, voices, voice_for = self._create_engine()
+            current_voice = voice_for["en"]
             print(f"[TTS] Initialized with {len(voices)} voices")
-            engine.stop()
-            del engine
         except Exception as e:
             print(f"[TTS] Init error: {e}")
         
@@ -72,23 +80,15 @@ class Speaker:
             
             text, lang = item
             
-            # Create fresh engine for this message
             try:
-                engine = pyttsx3.init()
-                voices = engine.getProperty('voices')
-                
-                # Try to switch voice based on language
-                for v in voices:
-                    name = v.name.lower()
-                    if lang == "fr" and ("french" in name or "paul" in name or "hortense" in name):
-                        engine.setProperty('voice', v.id)
-                        break
-                    elif lang == "en" and ("zira" in name or "david" in name or "english" in name):
-                        engine.setProperty('voice', v.id)
-                        break
-                
-                engine.setProperty('rate', 175)
-                engine.setProperty('volume', 1.0)
+                if engine is None:
+                    engine, _, voice_for = self._create_engine()
+                    current_voice = voice_for["en"]
+
+                voice = voice_for.get(lang, voice_for["en"])
+                if voice != current_voice:
+                    engine.setProperty('voice', voice)
+                    current_voice = voice
                 
                 preview = text[:50] + "..." if len(text) > 50 else text
                 print(f"[TTS] Speaking: {preview}")
@@ -102,20 +102,23 @@ class Speaker:
                     self._speaking_event.clear()
                     time.sleep(0.2)
                 
-                # Cleanup
-                engine.stop()
-                del engine
-                
                 print("[TTS] Done speaking")
                 
             except Exception as e:
                 print(f"[TTS] Error: {e}")
                 self._speaking_event.clear()
+                # Drop the engine, a fresh one is built for the next message
                 try:
                     engine.stop()
-                    del engine
-                except:
+                except Exception:
                     pass
+                engine = None
+
+        if engine is not None:
+            try:
+                engine.stop()
+            except Exception:
+                pass
     
     def say(self, text: str, lang: str = "en"):
         """Queue text to speak."""
@@ -4,13 +4,46 @@ Vision module - Face detection - OPTIMIZED FOR SPEED
 from __future__ import annotations
 import threading
 import time
-import base64
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Callable
 import cv2
 import mediapipe as mp
+import numpy as np
 import config
 
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR  # libjpeg-turbo, SIMD encoder
+except ImportError:
+    TurboJPEG = None
+
+try:
+    import pybase64 as _b64  # SIMD base64, same API as the stdlib module
+except ImportError:
+    import base64 as _b64
+
+
+def _update_streaks(face_seen: bool, present_streak: int, absent_streak: int, present: bool,
+                    req_present: int, req_absent: int) -> tuple[int, int, bool, bool]:
+    """Debounce face presence; returns (present_streak, absent_streak, present, changed)."""
+    if face_seen:
+        present_streak += 1
+        absent_streak = 0
+    else:
+        absent_streak += 1
+        present_streak = 0
+
+    if not present and present_streak >= req_present:
+        return present_streak, absent_streak, True, True
+    if present and absent_streak >= req_absent:
+        return present_streak, absent_streak, False, True
+    return present_streak, absent_streak, present, False
+
+
+def _box_px(xmin: float, ymin: float, bw: float, bh: float, w: int, h: int) -> tuple[int, int, int, int]:
+    """Relative bounding box -> pixel corners (x1, y1, x2, y2)."""
+    return int(xmin * w), int(ymin * h), int((xmin + bw) * w), int((ymin + bh) * h)
+
 
 @dataclass
 class FaceEvent:
@@ -23,9 +56,11 @@ class FacePresence:
     """Face detection - OPTIMIZED for speed and web streaming."""
     
     def __init__(self, on_change: Callable[[FaceEvent], None] | None = None, 
-                 on_frame: Callable[[str], None] | None = None):
+                 on_frame: Callable[[str], None] | None = None,
+                 should_stream: Callable[[], bool] | None = None):
         self.on_change = on_change
         self.on_frame = on_frame  # Callback for each frame (base64)
+        self.should_stream = should_stream  # Skip encoding while this returns False
         self._stop = threading.Event()
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._present = False
@@ -35,6 +70,17 @@ class FacePresence:
         self._cap = None
         self._frame_count = 0
 
+        # JPEG + base64 for the web UI run off the capture thread; at most one
+        # frame is in flight, later ones are dropped until it is done
+        self._enc_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vision-enc")
+        self._enc_pending: Future | None = None
+        self._jpeg = None
+        if TurboJPEG is not None:
+            try:
+                self._jpeg = TurboJPEG()
+            except Exception as e:  # python binding present, native lib missing
+                print(f"[VISION] TurboJPEG unavailable, using OpenCV encoder: {e}")
+
     def start(self):
         self._stop.clear()
         self._thread.start()
@@ -58,6 +104,33 @@ class FacePresence:
             except Exception as e:
                 print(f"[VISION] on_change error: {e}")
 
+    def _encode_and_emit(self, disp, present: bool, boxes: list[tuple[float, float, float, float]]):
+        """Draw overlays, encode to JPEG/base64 and hand the frame to on_frame."""
+        # Draw face box
+        if boxes:
+            h, w = disp.shape[:2]
+            color = (0, 255, 0) if present else (0, 165, 255)
+            for xmin, ymin, bw, bh in boxes:
+                x1, y1, x2, y2 = _box_px(xmin, ymin, bw, bh, w, h)
+                cv2.rectangle(disp, (x1, y1), (x2, y2), color, 2)
+
+        # Status text
+        status = "FACE: YES" if present else "FACE: NO"
+        color = (0, 255, 0) if present else (0, 0, 255)
+        cv2.putText(disp, status, (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+
+        # Encode to base64
+        if self._jpeg is not None:
+            buffer = self._jpeg.encode(disp, quality=70, pixel_format=TJPF_BGR)
+        else:
+            _, buffer = cv2.imencode('.jpg', disp, [cv2.IMWRITE_JPEG_QUALITY, 70])
+        frame_b64 = _b64.b64encode(buffer).decode('ascii')
+
+        try:
+            self.on_frame(frame_b64)
+        except Exception:
+            pass
+
     def _run(self):
         self._cap = cv2.VideoCapture(config.CAMERA_INDEX)
         if not self._cap.isOpened():
@@ -78,6 +151,16 @@ class FacePresence:
             min_detection_confidence=float(config.FACE_MIN_CONFIDENCE)
         )
 
+        # Reused detection buffers: no per-frame allocation for resize/convert
+        small = np.empty((180, 240, 3), np.uint8)
+        rgb = np.empty((180, 240, 3), np.uint8)
+
+        every_n = int(config.VISION_PROCESS_EVERY_N_FRAMES)
+        req_present = int(config.FACE_PRESENT_FRAMES_REQUIRED)
+        req_absent = int(config.FACE_ABSENT_FRAMES_REQUIRED)
+        stream_n = int(config.VISION_STREAM_EVERY_N_FRAMES)
+        stream_idle_n = int(config.VISION_STREAM_IDLE_EVERY_N_FRAMES)
+
         try:
             while not self._stop.is_set():
                 ok, frame = self._cap.read()
@@ -88,60 +171,41 @@ class FacePresence:
                 self._frame_count += 1
                 
                 # Process every N frames
-                do_process = (self._frame_count % config.VISION_PROCESS_EVERY_N_FRAMES == 0)
+                do_process = (self._frame_count % every_n == 0)
 
                 detections = None
                 if do_process:
-                    small = cv2.resize(frame, (240, 180))
-                    rgb = cv2.cvtColor(small, cv2.COLOR_BGR2RGB)
+                    cv2.resize(frame, (240, 180), dst=small, interpolation=cv2.INTER_AREA)
+                    cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=rgb)
                     result = face_detector.process(rgb)
                     detections = result.detections if result else None
                     face_seen = bool(detections)
 
-                    if face_seen:
-                        self._present_streak += 1
-                        self._absent_streak = 0
-                    else:
-                        self._absent_streak += 1
-                        self._present_streak = 0
-
                     # State transitions
-                    if (not self._present) and (self._present_streak >= config.FACE_PRESENT_FRAMES_REQUIRED):
-                        self._present = True
-                        self._emit(True)
-
-                    if self._present and (self._absent_streak >= config.FACE_ABSENT_FRAMES_REQUIRED):
-                        self._present = False
-                        self._emit(False)
-
-                # Send frame to web UI (every 3rd frame for bandwidth)
-                if self.on_frame and self._frame_count % 3 == 0:
-                    # Draw face box
-                    disp = frame.copy()
-                    if detections:
-                        h, w = disp.shape[:2]
-                        for d in detections:
+                    self._present_streak, self._absent_streak, present, changed = _update_streaks(
+                        face_seen, self._present_streak, self._absent_streak, self._present,
+                        req_present, req_absent,
+                    )
+                    if changed:
+                        self._present = present
+                        self._emit(present)
+
+                # Send frame to web UI (fewer frames while nobody is in view)
+                every = stream_n if self._present else stream_idle_n
+                if (self.on_frame and self._frame_count % every == 0
+                        and (self.should_stream is None or self.should_stream())):
+                    pending = self._enc_pending
+                    if pending is None or pending.done():
+                        # Copy the boxes out: detections belong to MediaPipe
+                        boxes = []
+                        for d in detections or ():
                             box = d.location_data.relative_bounding_box
-                            x1 = int(box.xmin * w)
-                            y1 = int(box.ymin * h)
-                            x2 = int((box.xmin + box.width) * w)
-                            y2 = int((box.ymin + box.height) * h)
-                            color = (0, 255, 0) if self._present else (0, 165, 255)
-                            cv2.rectangle(disp, (x1, y1), (x2, y2), color, 2)
-
-                    # Status text
-                    status = "FACE: YES" if self._present else "FACE: NO"
-                    color = (0, 255, 0) if self._present else (0, 0, 255)
-                    cv2.putText(disp, status, (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-
-                    # Encode to base64
-                    _, buffer = cv2.imencode('.jpg', disp, [cv2.IMWRITE_JPEG_QUALITY, 70])
-                    frame_b64 = base64.b64encode(buffer).decode('utf-8')
-                    
-                    try:
-                        self.on_frame(frame_b64)
-                    except Exception:
-                        pass
+                            boxes.append((box.xmin, box.ymin, box.width, box.height))
+                        # cap.read() returns a fresh array, the worker can draw on it
+                        self._enc_pending = self._enc_pool.submit(
+                            self._encode_and_emit, frame, self._present, boxes
+                        )
 
         finally:
-            self._cap.release()
\ No newline at end of file
+            self._cap.release()
+            self._enc_pool.shutdown(wait=False)
\ No newline at end of file
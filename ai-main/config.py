@@ -15,6 +15,8 @@ WEB_PORT = 8765
 CAMERA_INDEX = 0
 VISION_SHOW_WINDOW = False  # Disabled - using web UI instead
 VISION_PROCESS_EVERY_N_FRAMES = 2  # Faster processing
+VISION_STREAM_EVERY_N_FRAMES = 3   # Web UI preview rate while a face is present
+VISION_STREAM_IDLE_EVERY_N_FRAMES = 5  # ... and while nobody is in view
 FACE_PRESENT_FRAMES_REQUIRED = 3   # Faster detection
 FACE_ABSENT_FRAMES_REQUIRED = 8    # Faster goodbye
 FACE_MIN_CONFIDENCE = 0.5
@@ -31,14 +33,28 @@ VAD_MAX_UTTERANCE_SEC = 10    # Shorter max (was 15)
 
 # Microphone
 MIC_DEVICE_INDEX = None
+MIC_LATENCY = "low"           # PortAudio buffering: "low", "high" or seconds
 
 # Utterance filtering
 MIN_UTTERANCE_SEC = 0.3       # Shorter minimum (was 0.45)
 MICRO_GAP_MS = 150            # Shorter gaps (was 200)
+ASR_TRAILING_SILENCE_MS = 150 # Silence kept after the last voiced frame
+
+# ---------------------------
+# ASR backend
+# ---------------------------
+# "vosk"    - two small Kaldi models (EN + FR), best confidence wins
+# "whisper" - one multilingual faster-whisper model, language auto-detected
+#             (pip install faster-whisper)
+ASR_BACKEND = "vosk"
+WHISPER_MODEL_SIZE = "small"
+WHISPER_DEVICE = "cpu"           # "cuda" for GPU
+WHISPER_COMPUTE_TYPE = "int8"    # "int8_float16" on GPU
 
 # ---------------------------
 # Vosk models
 # ---------------------------
+ASR_DEFAULT_LANG = "en"       # Loaded at startup, the other one in the background
 VOSK_MODEL_EN_PATH = "models/vosk-model-small-en-us-0.15"
 VOSK_MODEL_FR_PATH = "models/vosk-model-small-fr-0.22"
 
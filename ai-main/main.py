@@ -4,7 +4,6 @@ Local Face + Voice AI - Main Entry Point
 Optimized for qwen2.5:3b
 """
 from __future__ import annotations
-import threading
 import sys
 from collections import deque
 import random
@@ -13,51 +12,10 @@ import time
 import config
 from assistant.tts import Speaker
 from assistant.vision import FacePresence, FaceEvent
-from assistant.audio import BilingualASR, is_stop_command, is_quit_command, parse_set_command
+from assistant.audio import BilingualASR, command_kind, parse_set_command
 from assistant.llm_ollama import OllamaClient, fallback_reply
-from assistant.persona import build_system_prompt
-
-
-def _load_lines(path: str) -> list[str]:
-    """Load non-empty, non-comment lines from a text file."""
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            lines = [l.strip() for l in f if l.strip() and not l.strip().startswith("#")]
-            return lines
-    except Exception:
-        return []
-
-
-# Load phrase files with fallbacks
-GREETINGS_EN = _load_lines("phrases/greetings_en.txt") or [
-    "Hey! I see you.",
-    "Hi — you're back.",
-    "Hello there.",
-    "Oh, a human. Nice.",
-    "Hi. I'm listening.",
-]
-
-GREETINGS_FR = _load_lines("phrases/greetings_fr.txt") or [
-    "Salut, je te vois.",
-    "Hey, te revoilà.",
-    "Bonjour.",
-    "Oh, un humain. Nice.",
-    "Salut. Je t'écoute.",
-]
-
-GOODBYES_EN = _load_lines("phrases/goodbyes_en.txt") or [
-    "Where'd you go?",
-    "I lost your face. Still there?",
-    "Okay, goodbye for now.",
-    "Hey—don't vanish on me.",
-]
-
-GOODBYES_FR = _load_lines("phrases/goodbyes_fr.txt") or [
-    "T'es où ?",
-    "Je ne te vois plus. T'es encore là ?",
-    "Ok, à plus.",
-    "Hey—reviens.",
-]
+from assistant.persona import clear_prompt_cache, presence_message, system_message
+from assistant.phrases import get_phrases, pick_phrase
 
 
 class Conversation:
@@ -67,7 +25,8 @@ class Conversation:
         self.history = deque(maxlen=max(2, int(config.HISTORY_TURNS) * 2))
         self.face_present = False
         self.last_lang = "en"
-        self._last_phrases: dict[str, str] = {}  # avoid repeating same phrase
+        self._last_idx: dict[str, int] = {}  # avoid repeating same phrase
+        self._rng = random.Random()  # own generator for phrase picks
 
     def add_user(self, text: str):
         self.history.append({"role": "user", "content": text})
@@ -78,60 +37,37 @@ class Conversation:
     def clear(self):
         self.history.clear()
 
-    def get_random_phrase(self, phrases: list[str], key: str) -> str:
+    def get_random_phrase(self, phrases: tuple[str, ...], key: str) -> str:
         """Get random phrase, avoiding immediate repetition."""
-        if len(phrases) <= 1:
-            return phrases[0] if phrases else ""
-        
-        last = self._last_phrases.get(key)
-        available = [p for p in phrases if p != last] or phrases
-        choice = random.choice(available)
-        self._last_phrases[key] = choice
-        return choice
+        return pick_phrase(phrases, self._last_idx, key, self._rng)
 
     def build_messages(self, lang: str) -> list[dict]:
-        sys_prompt = build_system_prompt(lang)
-
-        if lang == "fr":
-            presence_note = (
-                "Visage présent à la caméra : OUI." if self.face_present else
-                "Visage présent à la caméra : NON (l'utilisateur est peut-être parti)."
-            )
-        else:
-            presence_note = (
-                "Face present on camera: YES." if self.face_present else
-                "Face present on camera: NO (user might be away)."
-            )
-
-        msgs = [
-            {"role": "system", "content": sys_prompt},
-            {"role": "system", "content": presence_note},
-        ]
-        msgs.extend(list(self.history))
+        msgs = [system_message(lang), presence_message(lang, self.face_present)]
+        msgs.extend(self.history)
         return msgs
 
 
-def clamp01(x: float) -> float:
-    return max(0.0, min(1.0, float(x)))
+# Voice "set <key> <value>" -> (config attribute, value transform)
+_LIVE_SETTINGS = {
+    "niceness": ("NICENESS", config.clamp01),
+    "formality": ("FORMALITY", config.clamp01),
+    "banter": ("BANTER", config.clamp01),
+    "intelligence": ("INTELLIGENCE", config.clamp01),
+    "speed": ("SPEECH_RATE", lambda v: int(max(80, min(300, v)))),
+    "temperature": ("TEMPERATURE", lambda v: float(max(0.0, min(2.0, v)))),
+}
 
 
 def apply_live_setting(key: str, value: float) -> str:
     """Changes config values in-memory."""
     key = (key or "").lower().strip()
     
-    settings = {
-        "niceness": ("NICENESS", lambda v: clamp01(v)),
-        "formality": ("FORMALITY", lambda v: clamp01(v)),
-        "banter": ("BANTER", lambda v: clamp01(v)),
-        "intelligence": ("INTELLIGENCE", lambda v: clamp01(v)),
-        "speed": ("SPEECH_RATE", lambda v: int(max(80, min(300, v)))),
-        "temperature": ("TEMPERATURE", lambda v: float(max(0.0, min(2.0, v)))),
-    }
-    
-    if key in settings:
-        attr, transform = settings[key]
+    entry = _LIVE_SETTINGS.get(key)
+    if entry:
+        attr, transform = entry
         new_val = transform(value)
         setattr(config, attr, new_val)
+        clear_prompt_cache()
         return f"{attr} = {new_val:.2f}" if isinstance(new_val, float) else f"{attr} = {new_val}"
     
     return "Unknown setting."
@@ -157,12 +93,8 @@ def main():
 
     def say_presence_line(present: bool):
         lang = convo.last_lang
-        if present:
-            phrases = GREETINGS_FR if lang == "fr" else GREETINGS_EN
-            text = convo.get_random_phrase(phrases, "greeting")
-        else:
-            phrases = GOODBYES_FR if lang == "fr" else GOODBYES_EN
-            text = convo.get_random_phrase(phrases, "goodbye")
+        kind = "greeting" if present else "goodbye"
+        text = convo.get_random_phrase(get_phrases(kind, lang), kind)
         speaker.say(text, lang)
 
     def on_face_change(evt: FaceEvent):
@@ -185,8 +117,6 @@ def main():
     print("  - 'set banter 0.8'   → change personality")
     print("")
 
-    stopped = threading.Event()
-
     def on_heard(heard):
         text = heard.text.strip()
         lang = heard.lang
@@ -195,18 +125,18 @@ def main():
         print(f"\n[YOU:{lang}] {text}")
 
         # Voice commands
-        if is_stop_command(text):
+        cmd = command_kind(text)
+        if cmd == "stop":
             speaker.stop()
             print("[CMD] Stopped speaking")
             return
-            
-        if is_quit_command(text):
+
+        if cmd == "quit":
             print("[CMD] Quitting...")
-            stopped.set()
             raise SystemExit
 
         # Clear command
-        if text.lower() in {"clear", "efface", "reset", "recommence"}:
+        if cmd == "clear":
             convo.clear()
             msg = "Conversation cleared." if lang == "en" else "Conversation effacée."
             print(f"[CMD] {msg}")
@@ -227,7 +157,7 @@ def main():
 
         start_time = time.time()
         
-        if not ollama.is_up():
+        if not ollama.is_up_cached():
             reply = fallback_reply(text, lang)
         else:
             messages = convo.build_messages(lang)
@@ -240,6 +170,7 @@ def main():
                 )
             except Exception as e:
                 print(f"[ERROR] Ollama: {e}")
+                ollama.invalidate_status()
                 reply = fallback_reply(text, lang)
 
         elapsed = time.time() - start_time
@@ -262,7 +193,6 @@ def main():
     except Exception as e:
         print(f"[ERROR] {e}")
     finally:
-        stopped.set()
         print("[INFO] Shutting down...")
         try:
             vision.stop()
@@ -8,44 +8,54 @@ import threading
 import time
 import random
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from queue import Queue, Empty
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    _loads = json.loads
+
 import config
 from assistant.tts import get_speaker
 from assistant.vision import FacePresence, FaceEvent
-from assistant.audio import BilingualASR, Heard, is_stop_command, is_quit_command, parse_set_command
+from assistant.audio import BilingualASR, Heard, command_kind
 from assistant.llm_ollama import OllamaClient, fallback_reply
-from assistant.persona import build_system_prompt
+from assistant.persona import presence_message, system_message
+from assistant.phrases import get_phrases, pick_phrase
 
 
-# Load phrases
-def _load_lines(path: str) -> list[str]:
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return [l.strip() for l in f if l.strip() and not l.strip().startswith("#")]
-    except Exception:
-        return []
+# Broadcast queue, created on the server's event loop at startup
+message_queue: asyncio.Queue | None = None
 
-GREETINGS_EN = _load_lines("phrases/greetings_en.txt") or ["Hey! I see you.", "Hello!", "Hi there!"]
-GREETINGS_FR = _load_lines("phrases/greetings_fr.txt") or ["Salut !", "Bonjour !", "Hey !"]
-GOODBYES_EN = _load_lines("phrases/goodbyes_en.txt") or ["Where'd you go?", "Bye!", "See you!"]
-GOODBYES_FR = _load_lines("phrases/goodbyes_fr.txt") or ["T'es où ?", "À plus !", "Salut !"]
+# Queued in place of camera frames: the worker then sends state.latest_frame
+_FRAME_READY = object()
 
+# LLM turns run here one at a time, later turns queue up; a single worker
+# keeps streamed deltas, TTS sentences and history from interleaving
+_LLM_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm")
 
-# Thread-safe message queue
-message_queue: Queue = Queue()
+# Streamed replies are handed to TTS at these sentence ends
+_SENTENCE_END = frozenset(".!?")
 
 
 class AppState:
     def __init__(self):
-        self.websockets: list[WebSocket] = []
-        self.history = deque(maxlen=config.HISTORY_TURNS * 2)
+        self.websockets: set[WebSocket] = set()
+        self.history = deque(maxlen=max(2, int(config.HISTORY_TURNS) * 2))
         self.face_present = False
         self.last_lang = "en"
         self.ollama = OllamaClient()
@@ -54,26 +64,40 @@ class AppState:
         self.asr = None
         self.asr_thread = None
         self.listening = False
-        self._last_phrases: dict[str, str] = {}
-
-    def get_random_phrase(self, phrases: list[str], key: str) -> str:
-        if len(phrases) <= 1:
-            return phrases[0] if phrases else ""
-        last = self._last_phrases.get(key)
-        available = [p for p in phrases if p != last] or phrases
-        choice = random.choice(available)
-        self._last_phrases[key] = choice
-        return choice
+        # Replaced at the start of each LLM turn; "stop" sets it to cut the reply short
+        self.turn_cancel = threading.Event()
+        self.loop: asyncio.AbstractEventLoop | None = None
+        # Single-slot camera frame: a newer frame replaces one not yet sent
+        self.latest_frame: dict | None = None
+        self.frame_lock = threading.Lock()
+        self._last_idx: dict[str, int] = {}
+        self._rng = random.Random()  # own generator for phrase picks
+        # Encoded "init" message, reused while its inputs are unchanged
+        self.init_key: tuple | None = None
+        self.init_bytes: bytes | None = None
+
+    def get_random_phrase(self, phrases: tuple[str, ...], key: str) -> str:
+        return pick_phrase(phrases, self._last_idx, key, self._rng)
 
 state = AppState()
 
 
 def queue_message(msg: dict):
     """Thread-safe: queue message for broadcast."""
+    loop = state.loop
+    if loop is None or message_queue is None:
+        return  # server not started yet
     try:
-        message_queue.put_nowait(msg)
-    except:
-        pass
+        loop.call_soon_threadsafe(message_queue.put_nowait, msg)
+    except RuntimeError:
+        pass  # loop already closed
+
+
+def stop_speaking():
+    """Silence TTS and stop the reply being streamed, if any."""
+    state.turn_cancel.set()
+    if state.speaker:
+        state.speaker.stop()
 
 
 def on_face_change(evt: FaceEvent):
@@ -81,14 +105,9 @@ def on_face_change(evt: FaceEvent):
     state.face_present = evt.present
     
     lang = state.last_lang
-    if evt.present:
-        phrases = GREETINGS_FR if lang == "fr" else GREETINGS_EN
-        text = state.get_random_phrase(phrases, "greeting")
-        event_type = "face_appeared"
-    else:
-        phrases = GOODBYES_FR if lang == "fr" else GOODBYES_EN
-        text = state.get_random_phrase(phrases, "goodbye")
-        event_type = "face_disappeared"
+    kind = "greeting" if evt.present else "goodbye"
+    text = state.get_random_phrase(get_phrases(kind, lang), kind)
+    event_type = "face_appeared" if evt.present else "face_disappeared"
     
     # Speak
     if state.speaker:
@@ -104,10 +123,17 @@ def on_face_change(evt: FaceEvent):
 
 def on_frame(frame_b64: str):
     """Called for each camera frame (from vision thread)."""
-    queue_message({
+    if not state.websockets:
+        return
+    msg = {
         "type": "frame",
         "data": frame_b64
-    })
+    }
+    with state.frame_lock:
+        wake = state.latest_frame is None
+        state.latest_frame = msg
+    if wake:
+        queue_message(_FRAME_READY)
 
 
 def on_heard(heard: Heard):
@@ -126,52 +152,78 @@ def on_heard(heard: Heard):
     })
     
     # Handle commands
-    if is_stop_command(text):
-        if state.speaker:
-            state.speaker.stop()
+    cmd = command_kind(text)
+    if cmd == "stop":
+        stop_speaking()
         return
     
-    if is_quit_command(text):
+    if cmd == "quit":
         return
     
     # Process in separate thread to not block ASR
-    threading.Thread(target=process_message_sync, args=(text, lang), daemon=True).start()
+    _submit_turn(text, lang)
+
+
+def _log_turn_error(fut):
+    """Report a turn that died outside process_message_sync's own handling."""
+    if fut.cancelled():
+        return
+    e = fut.exception()
+    if e is not None:
+        print(f"[LLM] Turn failed: {e!r}")
+
+
+def _submit_turn(text: str, lang: str):
+    """Queue an LLM turn on the pool, logging any uncaught error."""
+    _LLM_POOL.submit(process_message_sync, text, lang).add_done_callback(_log_turn_error)
 
 
 def process_message_sync(text: str, lang: str):
     """Process message and get AI response (runs in thread)."""
+    cancel = state.turn_cancel = threading.Event()
     state.history.append({"role": "user", "content": text})
     
     # Build messages
-    sys_prompt = build_system_prompt(lang)
-    presence_note = (
-        "Visage présent : OUI." if state.face_present else "Visage présent : NON."
-    ) if lang == "fr" else (
-        "Face present: YES." if state.face_present else "Face present: NO."
-    )
+    messages = [system_message(lang), presence_message(lang, state.face_present)]
+    messages.extend(state.history)
     
-    messages = [
-        {"role": "system", "content": sys_prompt},
-        {"role": "system", "content": presence_note},
-    ]
-    messages.extend(list(state.history))
-    
-    # Get response
+    # Get response, pushing tokens to the UI as they arrive
     start = time.time()
+    buf: list[str] = []
+    spoken = 0  # buf[:spoken] has already gone to TTS
+    
+    def flush_speech(end: int):
+        nonlocal spoken
+        if cancel.is_set():
+            return
+        sentence = "".join(buf[spoken:end]).strip()
+        spoken = end
+        if sentence and state.speaker:
+            state.speaker.say(sentence, lang)
     
     try:
-        if state.ollama.is_up():
-            reply = state.ollama.chat(
+        if state.ollama.is_up_cached():
+            for tok in state.ollama.chat_stream(
                 model=config.OLLAMA_MODEL,
                 messages=messages,
                 max_tokens=config.MAX_TOKENS,
                 temperature=config.TEMPERATURE,
-            )
+            ):
+                if cancel.is_set():
+                    break  # closing the generator drops the HTTP stream
+                # Speak finished sentences early: end punctuation then a space
+                if tok[:1].isspace() and buf and buf[-1].rstrip()[-1:] in _SENTENCE_END:
+                    flush_speech(len(buf))
+                buf.append(tok)
+                queue_message({"type": "ai_delta", "text": tok, "lang": lang})
+            reply = "".join(buf)
         else:
             reply = fallback_reply(text, lang)
     except Exception as e:
         print(f"[LLM] Error: {e}")
-        reply = fallback_reply(text, lang)
+        state.ollama.invalidate_status()
+        # Keep what was already streamed rather than switching to a canned line
+        reply = "".join(buf) if buf else fallback_reply(text, lang)
     
     elapsed = time.time() - start
     reply = (reply or "").strip() or "..."
@@ -180,11 +232,13 @@ def process_message_sync(text: str, lang: str):
     
     print(f"[AI] ({elapsed:.1f}s) {reply}")
     
-    # Speak
-    if state.speaker:
+    # Speak whatever was not flushed at a sentence boundary
+    if buf:
+        flush_speech(len(buf))
+    elif state.speaker and not cancel.is_set():
         state.speaker.say(reply, lang)
     
-    # Queue for web
+    # Queue for web (final text replaces the streamed deltas)
     queue_message({
         "type": "ai_message",
         "text": reply,
@@ -231,37 +285,51 @@ app = FastAPI(title="Local Voice AI")
 async def broadcast_worker():
     """Background task to broadcast queued messages."""
     while True:
+        # Sleeps until something is queued, then coalesces the whole burst
+        batch = [await message_queue.get()]
+        while not message_queue.empty():
+            batch.append(message_queue.get_nowait())
         try:
-            while not message_queue.empty():
-                msg = message_queue.get_nowait()
+            for msg in batch:
+                if msg is _FRAME_READY:
+                    with state.frame_lock:
+                        msg, state.latest_frame = state.latest_frame, None
+                    if msg is None:
+                        continue
                 if state.websockets:
-                    data = json.dumps(msg)
-                    dead = []
-                    for ws in state.websockets:
-                        try:
-                            await ws.send_text(data)
-                        except:
-                            dead.append(ws)
-                    for ws in dead:
-                        if ws in state.websockets:
-                            state.websockets.remove(ws)
+                    data = _dumps(msg)  # bytes, sent as binary frames
+                    # Send to every client at once; one slow socket no longer
+                    # delays the others
+                    targets = list(state.websockets)
+                    results = await asyncio.gather(
+                        *(ws.send_bytes(data) for ws in targets), return_exceptions=True
+                    )
+                    state.websockets.difference_update(
+                        ws for ws, res in zip(targets, results) if isinstance(res, Exception)
+                    )
         except Exception as e:
             pass
-        await asyncio.sleep(0.02)  # 50 fps max
 
 
 @app.on_event("startup")
 async def startup():
+    global message_queue
     print("[WEB] Starting up...")
     
     # Start broadcast worker
+    message_queue = asyncio.Queue()
+    state.loop = asyncio.get_running_loop()
     asyncio.create_task(broadcast_worker())
     
     # Initialize TTS
     state.speaker = get_speaker()
     
     # Initialize vision with callbacks
-    state.vision = FacePresence(on_change=on_face_change, on_frame=on_frame)
+    state.vision = FacePresence(
+        on_change=on_face_change,
+        on_frame=on_frame,
+        should_stream=lambda: bool(state.websockets),
+    )
     state.vision.start()
     
     # Check Ollama
@@ -276,6 +344,7 @@ async def startup():
 @app.on_event("shutdown")
 async def shutdown():
     print("[WEB] Shutting down...")
+    _LLM_POOL.shutdown(wait=False, cancel_futures=True)
     stop_asr()
     if state.vision:
         state.vision.stop()
@@ -283,74 +352,105 @@ async def shutdown():
         state.speaker.close()
 
 
+# Checked once at import instead of on every page load
+_INDEX_PATH = Path(__file__).parent / "static" / "index.html"
+_INDEX_EXISTS = _INDEX_PATH.exists()
+
+
 @app.get("/", response_class=HTMLResponse)
 async def index():
-    html_path = Path(__file__).parent / "static" / "index.html"
-    if html_path.exists():
-        return FileResponse(html_path)
+    if _INDEX_EXISTS:
+        return FileResponse(_INDEX_PATH)
     return HTMLResponse("<h1>static/index.html not found</h1>")
 
 
+def _encoded_init() -> bytes:
+    """Serialized "init" message; re-encoded only when the state it shows changes."""
+    key = (state.face_present, state.listening, state.ollama.is_up_cached(), config.OLLAMA_MODEL)
+    if key != state.init_key:
+        state.init_bytes = _dumps({
+            "type": "init",
+            "face_present": key[0],
+            "listening": key[1],
+            "ollama_ok": key[2],
+            "model": key[3],
+        })
+        state.init_key = key
+    return state.init_bytes
+
+
+async def _h_chat(ws: WebSocket, msg: dict):
+    text = msg.get("text", "").strip()
+    lang = msg.get("lang", "en")
+    if text:
+        state.last_lang = lang
+        # Show user message immediately
+        await ws.send_text(json.dumps({
+            "type": "user_message",
+            "text": text,
+            "lang": lang
+        }))
+        # Process on the LLM pool
+        _submit_turn(text, lang)
+
+
+async def _h_start_listening(ws: WebSocket, msg: dict):
+    start_asr()
+    await ws.send_text(json.dumps({"type": "listening_started"}))
+
+
+async def _h_stop_listening(ws: WebSocket, msg: dict):
+    stop_asr()
+    await ws.send_text(json.dumps({"type": "listening_stopped"}))
+
+
+async def _h_stop_speaking(ws: WebSocket, msg: dict):
+    stop_speaking()
+
+
+async def _h_clear_history(ws: WebSocket, msg: dict):
+    state.history.clear()
+    await ws.send_text(json.dumps({"type": "history_cleared"}))
+
+
+async def _h_set_lang(ws: WebSocket, msg: dict):
+    state.last_lang = msg.get("lang", "en")
+
+
+# Client message type -> handler
+_WS_HANDLERS = {
+    "chat": _h_chat,
+    "start_listening": _h_start_listening,
+    "stop_listening": _h_stop_listening,
+    "stop_speaking": _h_stop_speaking,
+    "clear_history": _h_clear_history,
+    "set_lang": _h_set_lang,
+}
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
     await ws.accept()
-    state.websockets.append(ws)
+    state.websockets.add(ws)
     print(f"[WEB] Client connected ({len(state.websockets)} total)")
     
     # Send initial state
-    await ws.send_text(json.dumps({
-        "type": "init",
-        "face_present": state.face_present,
-        "listening": state.listening,
-        "ollama_ok": state.ollama.is_up(),
-        "model": config.OLLAMA_MODEL
-    }))
+    await ws.send_bytes(_encoded_init())
     
     try:
         while True:
             data = await ws.receive_text()
-            msg = json.loads(data)
-            
-            if msg["type"] == "chat":
-                text = msg.get("text", "").strip()
-                lang = msg.get("lang", "en")
-                if text:
-                    state.last_lang = lang
-                    # Show user message immediately
-                    await ws.send_text(json.dumps({
-                        "type": "user_message",
-                        "text": text,
-                        "lang": lang
-                    }))
-                    # Process in thread
-                    threading.Thread(target=process_message_sync, args=(text, lang), daemon=True).start()
-            
-            elif msg["type"] == "start_listening":
-                start_asr()
-                await ws.send_text(json.dumps({"type": "listening_started"}))
-            
-            elif msg["type"] == "stop_listening":
-                stop_asr()
-                await ws.send_text(json.dumps({"type": "listening_stopped"}))
-            
-            elif msg["type"] == "stop_speaking":
-                if state.speaker:
-                    state.speaker.stop()
-            
-            elif msg["type"] == "clear_history":
-                state.history.clear()
-                await ws.send_text(json.dumps({"type": "history_cleared"}))
-            
-            elif msg["type"] == "set_lang":
-                state.last_lang = msg.get("lang", "en")
+            msg = _loads(data)
+            handler = _WS_HANDLERS.get(msg.get("type"))
+            if handler:
+                await handler(ws, msg)
                 
     except WebSocketDisconnect:
         pass
     except Exception as e:
         print(f"[WEB] WebSocket error: {e}")
     finally:
-        if ws in state.websockets:
-            state.websockets.remove(ws)
+        state.websockets.discard(ws)
         print(f"[WEB] Client disconnected ({len(state.websockets)} total)")
 
 